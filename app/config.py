@@ -17,6 +17,28 @@ EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
 LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "llama3-8b-8192")
 CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
 CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "pdf_chunks")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+
+# Compact embedding storage
+# EMBEDDING_REDUCED_DIM: store vectors in ChromaDB at this dimension (unset = full dimension)
+# EMBEDDING_REDUCTION: "truncate" (Matryoshka models) or "pca"
+# EMBEDDING_STORAGE_DTYPE: "float32", "float16" or "int8" for snapshots and the re-scoring store
+# RESCORE_FACTOR: re-rank n_results * RESCORE_FACTOR candidates at full dimension (<= 1 disables)
+EMBEDDING_REDUCED_DIM = int(os.getenv("EMBEDDING_REDUCED_DIM", "0")) or None
+EMBEDDING_REDUCTION = os.getenv("EMBEDDING_REDUCTION", "truncate")
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float16")
+RESCORE_FACTOR = int(os.getenv("RESCORE_FACTOR", "4"))
+
+# Admission control and scheduling
+# EMBEDDING_WORKERS: threads running the shared embedding model (questions are served before ingestion)
+# MAX_CONCURRENT_INGESTIONS: uploads processed at once; MAX_PENDING_INGESTIONS: uploads allowed to wait (then 429)
+# MAX_QUEUED_QUERIES: questions in flight, from admission to response (then 503)
+# INGESTION_EMBED_BATCH_SIZE: chunks per ingestion embedding job; smaller batches let questions cut in sooner
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+MAX_CONCURRENT_INGESTIONS = int(os.getenv("MAX_CONCURRENT_INGESTIONS", "1"))
+MAX_PENDING_INGESTIONS = int(os.getenv("MAX_PENDING_INGESTIONS", "4"))
+MAX_QUEUED_QUERIES = int(os.getenv("MAX_QUEUED_QUERIES", "32"))
+INGESTION_EMBED_BATCH_SIZE = int(os.getenv("INGESTION_EMBED_BATCH_SIZE", "32"))
 
 
 def get_embedding_model() -> SentenceTransformer:
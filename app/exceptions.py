@@ -17,4 +17,12 @@ async def runtime_error_handler(request, exc):
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"error": "Internal server error", "detail": str(exc)}
-    )
\ No newline at end of file
+    )
+
+async def overloaded_error_handler(request, exc):
+    logger.warning(f"Request rejected by admission control: {exc}")
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": "Service busy", "detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
@@ -0,0 +1,285 @@
+# ingest.py
+"""
+Offline bulk ingestion.
+
+Build a pre-embedded snapshot from a directory of PDFs:
+
+    python -m app.ingest build ./pdfs --output corpus.npz
+
+Load a snapshot into the vector database (no re-embedding):
+
+    python -m app.ingest load corpus.npz --replace
+
+Report recall@k against index and re-scoring store size for each reduced dimension:
+
+    python -m app.ingest evaluate corpus.npz --dims 256 128 64
+
+Text extraction and chunking run in a process pool; chunks are embedded in large
+batches. Every finished PDF is checkpointed to ``<output>.parts/``, so re-running
+``build`` after an interruption only processes the PDFs that are still missing.
+Checkpoints are keyed by the file's size and mtime, the chunking parameters and
+the embedding model, so changed PDFs or settings are never served from stale parts.
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .logging_config import logger
+from .services.chunker import chunk_pdf
+from .services.compression import REDUCTION_METHODS, STORAGE_DTYPES, evaluate_storage_modes
+from .services.snapshot import import_snapshot, read_snapshot, write_snapshot
+
+
+def find_pdfs(root: str) -> List[str]:
+    """Returns all PDF paths under ``root``, relative to it, in a stable order."""
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(".pdf"):
+                found.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(found)
+
+
+def _document_id(rel_path: str) -> str:
+    return hashlib.sha1(rel_path.encode("utf-8")).hexdigest()[:16]
+
+
+def _part_path(parts_dir: str, root: str, rel_path: str, settings: str) -> str:
+    stat = os.stat(os.path.join(root, rel_path))
+    key = f"{rel_path}|{stat.st_size}|{stat.st_mtime_ns}|{settings}"
+    return os.path.join(parts_dir, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.npz")
+
+
+def _extract_and_chunk(root: str, rel_path: str, chunk_size: int, chunk_overlap: int) -> Tuple[str, List[str]]:
+    """Process-pool worker: extract and chunk a single PDF."""
+    chunks = chunk_pdf(os.path.join(root, rel_path), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return rel_path, chunks
+
+
+def _embed_and_checkpoint(
+    pending: List[Tuple[str, List[str]]],
+    part_paths: Dict[str, str],
+    batch_size: int,
+    model_name: str,
+) -> None:
+    """Embeds the chunks of several PDFs in one call, then writes one part per PDF."""
+    from .services.embedder import embed_chunks
+
+    all_chunks = [chunk for _, chunks in pending for chunk in chunks]
+    embeddings = embed_chunks(all_chunks, batch_size=batch_size)
+
+    offset = 0
+    for rel_path, chunks in pending:
+        doc_id = _document_id(rel_path)
+        write_snapshot(
+            part_paths[rel_path],
+            ids=[f"{doc_id}_chunk_{i}" for i in range(len(chunks))],
+            chunks=chunks,
+            embeddings=embeddings[offset:offset + len(chunks)],
+            metadatas=[{"source": rel_path, "chunk_index": i} for i in range(len(chunks))],
+            model_name=model_name,
+            dtype="float32"  # Quantize once, in _merge_parts
+        )
+        offset += len(chunks)
+
+
+def _merge_parts(parts: List[str], output: str, model_name: str, dtype: str) -> int:
+    ids: List[str] = []
+    texts: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    vectors: List[np.ndarray] = []
+
+    for part in parts:
+        data = read_snapshot(part)
+        if data["model_name"] != model_name:
+            raise ValueError(f"Checkpoint {part} was embedded with '{data['model_name']}', expected '{model_name}'")
+        if not data["ids"]:
+            continue  # PDF without extractable text
+        ids.extend(data["ids"])
+        texts.extend(data["texts"])
+        metadatas.extend(data["metadatas"])
+        vectors.append(data["embeddings"])
+
+    if not vectors:
+        raise ValueError("No chunks were produced; nothing to write")
+
+    write_snapshot(output, ids, texts, np.concatenate(vectors), metadatas, model_name, dtype=dtype)
+    return len(ids)
+
+
+def build_snapshot(
+    root: str,
+    output: str,
+    workers: int,
+    batch_size: int,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    keep_parts: bool = False,
+    dtype: str = "float16",
+) -> Tuple[int, List[str]]:
+    """
+    Extracts, chunks and embeds every PDF under ``root`` and writes a snapshot.
+
+    PDFs without extractable text are checkpointed as empty and count as processed.
+
+    Returns:
+        Number of chunks written to ``output`` and the PDFs that were skipped
+        because extraction failed.
+    """
+    from .config import EMBEDDING_MODEL_NAME
+
+    pdfs = find_pdfs(root)
+    if not pdfs:
+        raise ValueError(f"No PDF files found under {root}")
+
+    parts_dir = f"{output}.parts"
+    os.makedirs(parts_dir, exist_ok=True)
+
+    settings = f"{chunk_size}|{chunk_overlap}|{EMBEDDING_MODEL_NAME}"
+    part_paths = {p: _part_path(parts_dir, root, p, settings) for p in pdfs}
+    skipped: List[str] = []
+
+    todo = [p for p in pdfs if not os.path.exists(part_paths[p])]
+    logger.info(f"Found {len(pdfs)} PDFs, {len(pdfs) - len(todo)} already checkpointed, {len(todo)} to process")
+
+    if todo:
+        # "spawn" keeps workers from inheriting the parent's torch threads/model state
+        context = multiprocessing.get_context("spawn")
+        pending: List[Tuple[str, List[str]]] = []
+        pending_chunks = 0
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(_extract_and_chunk, root, rel_path, chunk_size, chunk_overlap): rel_path
+                for rel_path in todo
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                # Drop finished futures so their chunk texts are freed once embedded
+                rel_path = futures.pop(future)
+                try:
+                    _, chunks = future.result()
+                except Exception as e:
+                    logger.error(f"Skipping {rel_path}: {e}")
+                    skipped.append(rel_path)
+                    continue
+
+                if not chunks:
+                    logger.warning(f"No extractable text in {rel_path}; it will contribute no chunks")
+                    write_snapshot(
+                        part_paths[rel_path], [], [], np.empty((0, 0), dtype=np.float32), [],
+                        EMBEDDING_MODEL_NAME, dtype="float32"
+                    )
+                    continue
+
+                pending.append((rel_path, chunks))
+                pending_chunks += len(chunks)
+                if pending_chunks >= batch_size:
+                    _embed_and_checkpoint(pending, part_paths, batch_size, EMBEDDING_MODEL_NAME)
+                    logger.info(f"Embedded {pending_chunks} chunks ({done}/{len(todo)} PDFs processed)")
+                    pending, pending_chunks = [], 0
+
+        if pending:
+            _embed_and_checkpoint(pending, part_paths, batch_size, EMBEDDING_MODEL_NAME)
+            logger.info(f"Embedded {pending_chunks} chunks ({len(todo)}/{len(todo)} PDFs processed)")
+
+    parts = [part_paths[p] for p in pdfs if os.path.exists(part_paths[p])]
+    total = _merge_parts(parts, output, EMBEDDING_MODEL_NAME, dtype)
+    logger.info(f"Wrote {total} chunks from {len(parts)} PDFs to {output}")
+
+    # Keep checkpoints when PDFs were skipped so a rerun only retries those files
+    if not keep_parts and not skipped:
+        shutil.rmtree(parts_dir)
+
+    return total, skipped
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.ingest", description="Offline bulk PDF ingestion")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Embed a directory of PDFs into a snapshot file")
+    build.add_argument("input_dir", help="Directory searched recursively for PDFs")
+    build.add_argument("--output", "-o", required=True, help="Snapshot file to write (.npz)")
+    build.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Extraction/chunking processes")
+    build.add_argument("--batch-size", type=int, default=None, help="Chunks per embedding batch")
+    build.add_argument("--chunk-size", type=int, default=1000)
+    build.add_argument("--chunk-overlap", type=int, default=150)
+    build.add_argument("--keep-parts", action="store_true", help="Keep per-PDF checkpoints after merging")
+    build.add_argument("--dtype", choices=STORAGE_DTYPES, default=None, help="Vector storage type in the snapshot")
+
+    load = subparsers.add_parser("load", help="Bulk-import a snapshot into the vector database")
+    load.add_argument("snapshot", help="Snapshot file to import (.npz)")
+    load.add_argument("--replace", action="store_true", help="Clear the collection before importing")
+
+    evaluate = subparsers.add_parser("evaluate", help="Report recall@k vs footprint for each reduced dimension")
+    evaluate.add_argument("snapshot", help="Snapshot file whose vectors are evaluated (.npz)")
+    evaluate.add_argument("--k", type=int, default=10)
+    evaluate.add_argument("--queries", type=int, default=100, help="Vectors held out as queries")
+    evaluate.add_argument("--dims", type=int, nargs="*", default=[], help="Reduced dimensions to evaluate")
+    evaluate.add_argument("--method", choices=REDUCTION_METHODS, default="truncate")
+    evaluate.add_argument("--rescore-factor", type=int, default=4, help="Candidates re-ranked per result (<= 1 disables)")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            from .config import EMBEDDING_BATCH_SIZE, EMBEDDING_STORAGE_DTYPE
+
+            _, skipped = build_snapshot(
+                args.input_dir,
+                args.output,
+                workers=args.workers,
+                batch_size=args.batch_size or EMBEDDING_BATCH_SIZE,
+                chunk_size=args.chunk_size,
+                chunk_overlap=args.chunk_overlap,
+                keep_parts=args.keep_parts,
+                dtype=args.dtype or EMBEDDING_STORAGE_DTYPE
+            )
+            if skipped:
+                logger.error(f"{len(skipped)} PDFs were skipped and are missing from {args.output}:")
+                for rel_path in skipped:
+                    logger.error(f"  {rel_path}")
+                return 1
+        elif args.command == "evaluate":
+            snapshot = read_snapshot(args.snapshot)
+            report = evaluate_storage_modes(
+                snapshot["embeddings"],
+                k=args.k,
+                n_queries=args.queries,
+                dims=args.dims,
+                method=args.method,
+                rescore_factor=args.rescore_factor,
+                ids=snapshot["ids"]
+            )
+            print("Index is ChromaDB float32; store = full-dimension re-scoring vectors held in RAM")
+            print(
+                f"{'dim':>6} {'index MB':>10} {f'recall@{args.k}':>10} "
+                f"{'store':>8} {'store MB':>10} {'rescored':>10} {'total MB':>10}"
+            )
+            for row in report:
+                print(
+                    f"{row['dim']:>6} {row['index_mb']:>10} {row['recall']:>10} "
+                    f"{row['store_dtype'] or '-':>8} {row['store_mb']:>10} "
+                    f"{'-' if row['recall_rescored'] is None else row['recall_rescored']:>10} {row['total_mb']:>10}"
+                )
+        else:
+            count, cleared = import_snapshot(args.snapshot, replace=args.replace)
+            if args.replace:
+                logger.info(f"Cleared {cleared} previous chunks from database")
+            logger.info(f"Imported {count} chunks from {args.snapshot}")
+    except (ValueError, RuntimeError) as e:
+        logger.error(f"Ingestion failed: {e}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
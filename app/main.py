@@ -11,7 +11,8 @@ from .routes.health import router as health_router
 from .routes.upload_pdf import router as upload_pdf_router
 from .routes.qa import router as qa_router
 from .routes.database import router as database_router
-from .exceptions import value_error_handler, runtime_error_handler
+from .exceptions import value_error_handler, runtime_error_handler, overloaded_error_handler
+from .services.scheduler import scheduler, OverloadedError
 
 
 
@@ -57,6 +58,7 @@ app.include_router(qa_router)
 app.include_router(database_router)
 app.add_exception_handler(ValueError, value_error_handler)
 app.add_exception_handler(RuntimeError, runtime_error_handler)
+app.add_exception_handler(OverloadedError, overloaded_error_handler)
 
 
 # Add CORS middleware
@@ -78,6 +80,7 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup complete")
     yield
     logger.info("Shutting down PDF Q&A API...")
+    scheduler.shutdown()
 
 app.router.lifespan_context = lifespan
 
@@ -1,6 +1,6 @@
 # Pydantic models for request/response validation
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class QuestionRequest(BaseModel):
@@ -39,4 +39,28 @@ class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
     database_connected: bool
-    total_chunks: int
\ No newline at end of file
+    total_chunks: int
+
+class QueueStats(BaseModel):
+    queued: int
+    completed: int
+    rejected: int
+    avg_wait_ms: float
+    p99_wait_ms: float
+
+class IngestionStats(BaseModel):
+    active: int
+    pending: int
+    max_concurrent: int
+    max_pending: int
+    completed: int
+    rejected: int
+    avg_wait_ms: float
+    p99_wait_ms: float
+
+class SchedulerStats(BaseModel):
+    embedding_workers: int
+    queues: Dict[str, QueueStats]
+    ingestions: IngestionStats
+    queries_in_flight: int
+    max_queued_queries: int
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, status
 from ..models import DatabaseStats
-from ..services.vectordb import collection
+from ..services.vectordb import collection, clear_collection
 from ..logging_config import logger
 
 
@@ -33,11 +33,9 @@ async def get_database_stats():
 async def clear_database():
     """Clear all documents from the vector database."""
     try:
-        # Get all IDs and delete them
-        result = collection.get()
-        if result and result.get('ids'):
-            collection.delete(ids=result['ids'])
-            deleted_count = len(result['ids'])
+        # Delete all chunks (and any compressed-storage sidecar files)
+        deleted_count = clear_collection()
+        if deleted_count:
             logger.info(f"Cleared {deleted_count} chunks from database")
             return {"message": f"Successfully cleared {deleted_count} chunks from database"}
         else:
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends
 from datetime import datetime
 
-from ..models import HealthResponse
+from ..models import HealthResponse, SchedulerStats
 from ..dependencies import get_db_status
+from ..services.scheduler import scheduler
 
 
 router = APIRouter(
@@ -29,4 +30,9 @@ async def health_check(db_status: dict = Depends(get_db_status)):
         timestamp=datetime.now(),
         database_connected=db_status["connected"],
         total_chunks=db_status["count"]
-    )
\ No newline at end of file
+    )
+
+@router.get("/health/scheduler", response_model=SchedulerStats, tags=["Health"])
+async def scheduler_stats():
+    """Queue depths, wait times and rejections for questions and ingestion."""
+    return SchedulerStats(**scheduler.stats())
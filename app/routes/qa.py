@@ -1,7 +1,10 @@
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, status, Depends
+from starlette.concurrency import run_in_threadpool
 from ..models import QuestionRequest, QuestionResponse
+from ..services.embedder import embed_chunks
 from ..services.query import ask_question
+from ..services.scheduler import scheduler, INTERACTIVE
 from ..dependencies import get_db_status
 from ..logging_config import logger
 
@@ -19,7 +22,7 @@ async def ask_question_endpoint(request: QuestionRequest, db_status: dict = Depe
     
     This endpoint:
     1. Validates that documents exist in the database
-    2. Embeds your question
+    2. Embeds your question (ahead of any queued ingestion work)
     3. Finds the most similar document chunks
     4. Uses Groq LLM to generate an answer based on the context
     """
@@ -38,35 +41,43 @@ async def ask_question_endpoint(request: QuestionRequest, db_status: dict = Depe
             detail="No documents found in database. Please upload a PDF first."
         )
     
-    try:
-        logger.info(f"Processing question: {request.question}")
+    # Counted against MAX_QUEUED_QUERIES until the response is ready
+    async with scheduler.query_slot():
+        try:
+            logger.info(f"Processing question: {request.question}")
         
-        # Ask the question
-        result = ask_question(request.question, n_results=request.n_results or 2)
+            # Embed at interactive priority, then query and call the LLM off the event loop
+            question_embedding = await scheduler.submit(INTERACTIVE, embed_chunks, [request.question])
+            result = await run_in_threadpool(
+                ask_question,
+                request.question,
+                n_results=request.n_results or 2,
+                question_embedding=question_embedding[0]
+            )
         
-        processing_time = (datetime.now() - start_time).total_seconds() * 1000
+            processing_time = (datetime.now() - start_time).total_seconds() * 1000
         
-        logger.info(f"Question answered in {processing_time:.2f}ms")
+            logger.info(f"Question answered in {processing_time:.2f}ms")
         
-        return QuestionResponse(
-            question=result["question"],
-            answer=result["answer"],
-            retrieved_chunks=result["retrieved_chunks"],
-            similarity_scores=result["similarity_scores"],
-            timestamp=datetime.now(),
-            processing_time_ms=round(processing_time, 2)
-        )
+            return QuestionResponse(
+                question=result["question"],
+                answer=result["answer"],
+                retrieved_chunks=result["retrieved_chunks"],
+                similarity_scores=result["similarity_scores"],
+                timestamp=datetime.now(),
+                processing_time_ms=round(processing_time, 2)
+            )
         
-    except Exception as e:
-        logger.error(f"Failed to answer question: {e}")
+        except Exception as e:
+            logger.error(f"Failed to answer question: {e}")
         
-        if isinstance(e, (ValueError, RuntimeError)):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(e)
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to process question"
-            )
\ No newline at end of file
+            if isinstance(e, (ValueError, RuntimeError)):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to process question"
+                )
\ No newline at end of file
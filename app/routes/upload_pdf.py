@@ -1,14 +1,18 @@
 import os
 import tempfile
+import numpy as np
 from fastapi import APIRouter, UploadFile, File, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 
 from ..logging_config import logger
 from ..models import UploadResponse
-from ..services.chunker import chunk_pdf, extract_text_from_pdf
+from ..config import INGESTION_EMBED_BATCH_SIZE
+from ..services.chunker import extract_and_chunk_pdf
 from ..services.embedder import embed_chunks
+from ..services.scheduler import scheduler, INGESTION, OverloadedError
 from ..services.vectordb import store_embeddings
-from ..services.vectordb import collection
+from ..services.vectordb import clear_collection
 
 
 router = APIRouter(
@@ -24,13 +28,12 @@ async def upload_pdf(file: UploadFile = File(...)):
     
     This endpoint:
     1. Validates the uploaded file is a PDF
-    2. Extracts text from the PDF
-    3. Chunks the text into manageable pieces
-    4. Creates embeddings for each chunk
+    2. Waits for an ingestion slot (429 with Retry-After if too many uploads are queued)
+    3. Extracts text from the PDF and chunks it in a worker process
+    4. Creates embeddings for each chunk at lower priority than questions
     5. Stores everything in the vector database
     """
     start_time = datetime.now()
-    temp_file_path = None  # Initialize here to ensure it's always defined
     
     # Validate file type
     if not file.filename or not file.filename.lower().endswith('.pdf'):
@@ -45,6 +48,13 @@ async def upload_pdf(file: UploadFile = File(...)):
             detail="File size exceeds 50MB limit"
         )
     
+    async with scheduler.ingestion_slot():
+        return await _process_pdf(file, start_time)
+
+
+async def _process_pdf(file: UploadFile, start_time: datetime) -> UploadResponse:
+    temp_file_path = None  # Initialize here to ensure it's always defined
+
     try:
         # Create temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
@@ -54,29 +64,29 @@ async def upload_pdf(file: UploadFile = File(...)):
         
         logger.info(f"Processing PDF: {file.filename or 'unknown'}")
         
-        # Clear previous chunks from the vector database
-        existing = collection.get()
-        if existing and existing.get('ids'):
-            collection.delete(ids=existing['ids'])
-            logger.info(f"Cleared {len(existing['ids'])} previous chunks from database")
-        
-        # Extract text and validate
-        full_text = extract_text_from_pdf(temp_file_path)
+        # Extract text and chunk the PDF in a worker process
+        full_text, chunks = await scheduler.run_extraction(extract_and_chunk_pdf, temp_file_path)
         if not full_text.strip():
             raise ValueError("PDF appears to be empty or contains no extractable text")
         
-        # Chunk the PDF
-        chunks = chunk_pdf(temp_file_path)
         if not chunks:
             raise ValueError("Failed to create chunks from PDF")
         
         logger.info(f"Created {len(chunks)} chunks from {file.filename or 'unknown'}")
         
-        # Create embeddings
-        embeddings = embed_chunks(chunks)
+        # Create embeddings in small low-priority batches so questions can cut in
+        embeddings = np.concatenate([
+            await scheduler.submit(INGESTION, embed_chunks, chunks[i:i + INGESTION_EMBED_BATCH_SIZE])
+            for i in range(0, len(chunks), INGESTION_EMBED_BATCH_SIZE)
+        ])
+        
+        # Replace previous chunks only once the new ones are ready
+        cleared = await run_in_threadpool(clear_collection)
+        if cleared:
+            logger.info(f"Cleared {cleared} previous chunks from database")
         
         # Store in vector database
-        store_embeddings(chunks, embeddings)
+        await run_in_threadpool(store_embeddings, chunks, embeddings)
         
         # Clean up temporary file
         if temp_file_path:
@@ -95,6 +105,11 @@ async def upload_pdf(file: UploadFile = File(...)):
             processing_time_ms=round(processing_time, 2)
         )
         
+    except OverloadedError:
+        if temp_file_path:
+            os.unlink(temp_file_path)
+        raise
+        
     except Exception as e:
         # Clean up temporary file on error
         if temp_file_path:
@@ -1,6 +1,6 @@
 # app/chunker.py
 
-from typing import List
+from typing import List, Tuple
 from pypdf import PdfReader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
@@ -44,6 +44,21 @@ def chunk_pdf(pdf_path: str, chunk_size: int = 1000, chunk_overlap: int = 150) -
     full_text = extract_text_from_pdf(pdf_path)
     return chunk_text(full_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
+def extract_and_chunk_pdf(pdf_path: str, chunk_size: int = 1000, chunk_overlap: int = 150) -> Tuple[str, List[str]]:
+    """
+    Extracts the text of a PDF once and chunks it.
+
+    Args:
+        pdf_path: Path to the PDF file.
+        chunk_size: Max size of each chunk.
+        chunk_overlap: Overlap between chunks.
+
+    Returns:
+        The full cleaned text and its list of chunks.
+    """
+    full_text = extract_text_from_pdf(pdf_path)
+    return full_text, chunk_text(full_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
 def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 150) -> List[str]:
     """
     Splits long text into overlapping chunks using RecursiveCharacterTextSplitter.
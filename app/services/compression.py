@@ -0,0 +1,352 @@
+# app/compression.py
+
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+REDUCTION_METHODS = ("truncate", "pca")
+
+# PCA is fitted on at most this many rows; the covariance converges long before
+PCA_MAX_SAMPLES = 50_000
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def fit_reducer(embeddings: np.ndarray, dim: int, method: str = "truncate", seed: int = 0) -> Dict[str, Any]:
+    """
+    Fits a dimensionality reducer on a set of embeddings.
+
+    PCA needs at least ``dim`` embeddings to produce ``dim`` meaningful
+    components; with fewer (e.g. a short PDF uploaded into an empty collection)
+    it falls back to truncation. Large inputs are subsampled to
+    ``PCA_MAX_SAMPLES`` rows.
+
+    Args:
+        embeddings: Array of shape (n, full_dim).
+        dim: Target dimension.
+        method: "truncate" keeps the leading dimensions (Matryoshka-trained models);
+            "pca" projects onto the top principal components.
+        seed: Seed for the PCA subsample.
+
+    Returns:
+        A reducer dict accepted by ``apply_reducer`` and ``save_reducer``.
+    """
+    if method not in REDUCTION_METHODS:
+        raise ValueError(f"Unknown reduction method '{method}', expected one of {REDUCTION_METHODS}")
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    full_dim = embeddings.shape[1]
+    if not 0 < dim <= full_dim:
+        raise ValueError(f"Reduced dimension must be between 1 and {full_dim}, got {dim}")
+
+    if method == "truncate" or len(embeddings) < max(dim, 2):
+        return {"method": "truncate", "dim": dim}
+
+    if len(embeddings) > PCA_MAX_SAMPLES:
+        rng = np.random.default_rng(seed)
+        sample = embeddings[rng.choice(len(embeddings), PCA_MAX_SAMPLES, replace=False)]
+    else:
+        sample = embeddings
+
+    # Eigenvectors of the full_dim x full_dim covariance avoid the n x full_dim SVD factor
+    mean = sample.mean(axis=0)
+    centered = (sample - mean).astype(np.float64)
+    _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    components = eigenvectors[:, ::-1][:, :dim].T
+
+    return {
+        "method": method,
+        "dim": dim,
+        "mean": mean.astype(np.float32),
+        "components": components.astype(np.float32),
+    }
+
+
+def apply_reducer(embeddings: np.ndarray, reducer: Dict[str, Any]) -> np.ndarray:
+    """
+    Reduces embeddings to ``reducer["dim"]`` dimensions and re-normalizes them.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if reducer["method"] == "truncate":
+        reduced = embeddings[:, :reducer["dim"]]
+    else:
+        reduced = (embeddings - reducer["mean"]) @ reducer["components"].T
+    return _normalize(reduced).astype(np.float32, copy=False)
+
+
+def save_reducer(path: str, reducer: Dict[str, Any]) -> None:
+    arrays = {k: np.asarray(v) for k, v in reducer.items()}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_reducer(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        reducer: Dict[str, Any] = {"method": str(data["method"]), "dim": int(data["dim"])}
+        if reducer["method"] == "pca":
+            reducer["mean"] = data["mean"]
+            reducer["components"] = data["components"]
+    return reducer
+
+
+def quantize(embeddings: np.ndarray, dtype: str = "float16") -> Dict[str, np.ndarray]:
+    """
+    Compresses embeddings for storage.
+
+    Args:
+        embeddings: Array of shape (n, dim).
+        dtype: "float32", "float16", or "int8" (symmetric scalar quantization with
+            one scale per dimension).
+
+    Returns:
+        A dict with ``codes`` and, for int8, ``scales``.
+    """
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unknown storage dtype '{dtype}', expected one of {STORAGE_DTYPES}")
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if dtype != "int8":
+        return {"codes": embeddings.astype(dtype, copy=False)}
+
+    scales = np.abs(embeddings).max(axis=0) / 127.0 if len(embeddings) else np.ones(embeddings.shape[1:])
+    scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+    codes = np.clip(np.rint(embeddings / scales), -127, 127).astype(np.int8)
+    return {"codes": codes, "scales": scales}
+
+
+def dequantize(codes: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inverse of ``quantize``; always returns float32."""
+    vectors = np.asarray(codes).astype(np.float32)
+    if scales is not None:
+        vectors *= scales
+    return vectors
+
+
+def _shard_paths(store_dir: str) -> List[str]:
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(
+        os.path.join(store_dir, name)
+        for name in os.listdir(store_dir)
+        if name.startswith("shard_") and name.endswith(".npz")
+    )
+
+
+def _save_shard(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _encode_ids(ids: Sequence[str]) -> np.ndarray:
+    # Fixed-width UTF-8 bytes take a quarter of the memory of NumPy's UCS-4 strings
+    return np.array([chunk_id.encode("utf-8") for chunk_id in ids], dtype=np.bytes_)
+
+
+def append_rescore_vectors(store_dir: str, ids: List[str], embeddings: np.ndarray, dtype: str) -> None:
+    """
+    Adds full-dimension vectors to the sharded re-scoring store.
+
+    Each call writes one new shard quantized with its own scales, so rows already
+    on disk are never requantized. Ids that are already stored are dropped from
+    their old shards (codes are copied as-is), so every id is stored exactly once
+    and re-importing the same ids does not grow the store. Rows are sorted by id
+    within each shard so lookups can binary-search.
+    """
+    if not len(ids):
+        return
+
+    os.makedirs(store_dir, exist_ok=True)
+    new_ids = _encode_ids(ids)
+    paths = _shard_paths(store_dir)
+
+    for path in paths:
+        with np.load(path, allow_pickle=False) as data:
+            stale = np.isin(data["ids"], new_ids)
+            if not stale.any():
+                continue
+            kept = {name: data[name] for name in data.files}
+        if stale.all():
+            os.unlink(path)
+            continue
+        kept["ids"] = kept["ids"][~stale]
+        kept["codes"] = kept["codes"][~stale]
+        _save_shard(path, kept)
+
+    order = np.argsort(new_ids, kind="stable")
+    packed = quantize(np.asarray(embeddings, dtype=np.float32)[order], dtype)
+    next_index = int(os.path.basename(paths[-1])[len("shard_"):-len(".npz")]) + 1 if paths else 0
+    _save_shard(
+        os.path.join(store_dir, f"shard_{next_index:06d}.npz"),
+        {"ids": new_ids[order], **packed}
+    )
+
+
+def load_rescore_store(store_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Loads every shard of the re-scoring store.
+
+    Returns:
+        ``None`` if the store is empty, otherwise a dict with ``shards`` (sorted
+        ids, codes and scales per shard) and ``nbytes``, the memory they occupy.
+    """
+    paths = _shard_paths(store_dir)
+    if not paths:
+        return None
+
+    shards = []
+    for path in paths:
+        with np.load(path, allow_pickle=False) as data:
+            shards.append({
+                "ids": data["ids"],
+                "codes": data["codes"],
+                "scales": data["scales"] if "scales" in data.files else None,
+            })
+    nbytes = sum(array.nbytes for shard in shards for array in shard.values() if array is not None)
+    return {"shards": shards, "nbytes": nbytes}
+
+
+def get_rescore_vectors(store: Dict[str, Any], ids: List[str]) -> Tuple[List[int], np.ndarray]:
+    """
+    Looks up full-dimension vectors by id.
+
+    Returns:
+        The positions in ``ids`` that were found, and their float32 vectors.
+    """
+    wanted = _encode_ids(ids)
+    dim = store["shards"][0]["codes"].shape[1]
+    vectors = np.zeros((len(ids), dim), dtype=np.float32)
+    found = np.zeros(len(ids), dtype=bool)
+
+    for shard in store["shards"]:
+        shard_ids = shard["ids"]
+        if not len(shard_ids) or not len(wanted):
+            continue
+        rows = np.minimum(np.searchsorted(shard_ids, wanted), len(shard_ids) - 1)
+        hits = (shard_ids[rows] == wanted) & ~found
+        if hits.any():
+            vectors[hits] = dequantize(shard["codes"][rows[hits]], shard["scales"])
+            found |= hits
+
+    return np.flatnonzero(found).tolist(), vectors[found]
+
+
+def bytes_per_vector(dim: int, dtype: str) -> int:
+    return dim * np.dtype(dtype).itemsize
+
+
+def squared_l2(query: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Squared L2 distances, matching ChromaDB's default "l2" space."""
+    diff = vectors - query
+    return np.einsum("ij,ij->i", diff, diff)
+
+
+def _top_k(queries: np.ndarray, base: np.ndarray, k: int) -> np.ndarray:
+    # ||q - b||^2 ranks identically to ||b||^2 - 2 q.b
+    scores = (base * base).sum(axis=1)[None, :] - 2.0 * queries @ base.T
+    top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f[:k]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def evaluate_storage_modes(
+    embeddings: np.ndarray,
+    k: int = 10,
+    n_queries: int = 100,
+    dims: Sequence[int] = (),
+    method: str = "truncate",
+    rescore_factor: int = 4,
+    ids: Optional[Sequence[str]] = None,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Measures recall@k against exact float32 search for each deployable storage mode.
+
+    A random sample of the embeddings is held out as queries; the rest form the
+    corpus. ChromaDB always stores the index as float32, so each dimension is
+    measured at float32. For reduced dimensions with ``rescore_factor`` > 1,
+    recall is also measured after re-ranking ``k * rescore_factor`` candidates
+    with the full-dimension re-scoring store, once per store dtype.
+
+    Footprints are for the whole of ``embeddings``. The store's includes its id
+    arrays when ``ids`` is given, i.e. the memory it occupies on the server.
+
+    Returns:
+        One dict per mode with ``dim``, ``index_mb``, ``recall``, ``store_dtype``,
+        ``store_mb``, ``recall_rescored`` and ``total_mb``. Rows without a
+        re-scoring store have ``store_dtype`` and ``recall_rescored`` set to ``None``.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n_queries = min(n_queries, len(embeddings) // 2)
+    if n_queries < 1 or len(embeddings) - n_queries < k:
+        raise ValueError(f"Need at least {k + 1} embeddings to evaluate recall@{k}")
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(embeddings))
+    queries, base = embeddings[order[:n_queries]], embeddings[order[n_queries:]]
+    truth = _top_k(queries, base, k)
+
+    stores = {}
+    if rescore_factor > 1:
+        id_bytes = _encode_ids(ids).nbytes if ids is not None else 0
+        for dtype in STORAGE_DTYPES:
+            packed = quantize(embeddings, dtype)
+            restored = dequantize(packed["codes"], packed.get("scales"))[order[n_queries:]]
+            stores[dtype] = (restored, id_bytes + sum(v.nbytes for v in packed.values()))
+
+    full_dim = embeddings.shape[1]
+    report = []
+    for dim in [full_dim] + sorted({d for d in dims if d < full_dim}, reverse=True):
+        if dim == full_dim:
+            q, b = queries, base
+        else:
+            reducer = fit_reducer(base, dim, method)
+            q, b = apply_reducer(queries, reducer), apply_reducer(base, reducer)
+        index_bytes = len(embeddings) * bytes_per_vector(dim, "float32")
+
+        if dim == full_dim or not stores:
+            report.append({
+                "dim": dim,
+                "index_mb": round(index_bytes / 1024 ** 2, 3),
+                "recall": round(_recall(_top_k(q, b, k), truth), 4),
+                "store_dtype": None,
+                "store_mb": 0.0,
+                "recall_rescored": None,
+                "total_mb": round(index_bytes / 1024 ** 2, 3),
+            })
+            continue
+
+        candidates = _top_k(q, b, min(len(base), k * rescore_factor))
+        recall = round(_recall(candidates[:, :k], truth), 4)
+        for dtype, (restored, store_bytes) in stores.items():
+            rescored = np.array([
+                cand[np.argsort(squared_l2(query, restored[cand]))]
+                for query, cand in zip(queries, candidates)
+            ])
+            report.append({
+                "dim": dim,
+                "index_mb": round(index_bytes / 1024 ** 2, 3),
+                "recall": recall,
+                "store_dtype": dtype,
+                "store_mb": round(store_bytes / 1024 ** 2, 3),
+                "recall_rescored": round(_recall(rescored[:, :k], truth), 4),
+                "total_mb": round((index_bytes + store_bytes) / 1024 ** 2, 3),
+            })
+
+    return report
@@ -7,18 +7,19 @@ from ..config import get_embedding_model
 # Load the embedding model (SentenceTransformer instance)
 embedding_model = get_embedding_model()
 
-def embed_chunks(chunks: List[str]) -> List[List[float]]:
+def embed_chunks(chunks: List[str], batch_size: int = 32) -> np.ndarray:
     """
     Embeds a list of text chunks using the configured SentenceTransformer model.
     
     Args:
         chunks: List of text strings (chunks).
+        batch_size: Number of chunks encoded per forward pass.
 
     Returns:
-        List of vector embeddings (each embedding is a list of floats).
+        A float32 array of shape (len(chunks), dim).
     """
     try:
-        embeddings = embedding_model.encode(chunks)
-        return embeddings.tolist()  # Convert from numpy array to list of lists
+        # Stay in NumPy: converting to nested lists boxes every float
+        return embedding_model.encode(chunks, batch_size=batch_size, convert_to_numpy=True)
     except Exception as e:
         raise RuntimeError(f"Error during embedding: {e}")
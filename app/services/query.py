@@ -1,21 +1,23 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+import numpy as np
 from .embedder import embed_chunks
 from .vectordb import query_similar_chunks
 from ..config import get_llm_client
 
 llm = get_llm_client()
 
-def ask_question(question: str, n_results: int = 3) -> Dict[str, Any]:
+def ask_question(question: str, n_results: int = 3, question_embedding: Optional[np.ndarray] = None) -> Dict[str, Any]:
     """
     Full Q&A flow:
-    - Embed the question
+    - Embed the question (unless a precomputed embedding is passed)
     - Get similar chunks from ChromaDB
     - Prompt Groq LLM with context
     - Return the answer and metadata
     """
     try:
         # Step 1: Embed the question
-        question_embedding = embed_chunks([question])[0]
+        if question_embedding is None:
+            question_embedding = embed_chunks([question])[0]
 
         # Step 2: Query vector DB
         results = query_similar_chunks(question_embedding, n_results=n_results)
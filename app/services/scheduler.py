@@ -0,0 +1,278 @@
+# app/scheduler.py
+
+import asyncio
+import itertools
+import math
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+
+from ..config import (
+    EMBEDDING_WORKERS,
+    MAX_CONCURRENT_INGESTIONS,
+    MAX_PENDING_INGESTIONS,
+    MAX_QUEUED_QUERIES,
+)
+
+# Lower value runs first
+INTERACTIVE = 0
+INGESTION = 1
+
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", INGESTION: "ingestion"}
+
+
+class OverloadedError(Exception):
+    """
+    Raised when a request is rejected by admission control.
+
+    Carries the HTTP status to return (429 or 503) and a Retry-After hint in seconds.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _WaitStats:
+    """Rolling wait-time samples (in ms) plus simple counters for one work class."""
+
+    def __init__(self, window: int = 1000):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.completed = 0
+        self.rejected = 0
+
+    def record(self, wait_ms: float) -> None:
+        self.samples.append(wait_ms)
+        self.completed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        p99 = ordered[min(len(ordered) - 1, math.ceil(0.99 * len(ordered)) - 1)] if ordered else 0.0
+        return {
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+            "p99_wait_ms": round(p99, 2),
+        }
+
+
+class PriorityScheduler:
+    """
+    Runs work on the shared embedding model with interactive work first.
+
+    Jobs are queued by priority and executed by a small pool of worker threads
+    (``EMBEDDING_WORKERS``). Ingestion embeds in small batches, so a queued
+    question waits for at most one ingestion batch rather than a whole upload.
+
+    Ingestion requests must additionally hold an ingestion slot; at most
+    ``MAX_CONCURRENT_INGESTIONS`` run at once and at most
+    ``MAX_PENDING_INGESTIONS`` may wait for a slot before new uploads are
+    rejected with 429. Questions hold a query slot from admission to response
+    (embedding, retrieval and the LLM call); once ``MAX_QUEUED_QUERIES`` are in
+    flight, new questions are rejected with 503.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_concurrent_ingestions: int = 1,
+        max_pending_ingestions: int = 4,
+        max_queued_queries: int = 32,
+    ):
+        self.workers = max(1, workers)
+        self.max_concurrent_ingestions = max(1, max_concurrent_ingestions)
+        self.max_pending_ingestions = max(0, max_pending_ingestions)
+        self.max_queued_queries = max(1, max_queued_queries)
+
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = {INTERACTIVE: 0, INGESTION: 0}
+        self._job_stats = {INTERACTIVE: _WaitStats(), INGESTION: _WaitStats()}
+        self._service_ms: Deque[float] = deque(maxlen=100)
+        self._threads: list = []
+
+        self._queries_in_flight = 0
+        self._query_ms: Deque[float] = deque(maxlen=100)
+
+        self._ingestion_slots = asyncio.Semaphore(self.max_concurrent_ingestions)
+        self._ingestions_active = 0
+        self._ingestions_pending = 0
+        self._ingestion_stats = _WaitStats()
+        self._ingestion_ms: Deque[float] = deque(maxlen=20)
+
+        self._extraction_pool: Optional[ProcessPoolExecutor] = None
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"embedding-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self) -> None:
+        while True:
+            priority, _, enqueued_at, fn, args, future = self._queue.get()
+            with self._lock:
+                self._queued[priority] -= 1
+
+            if not future.set_running_or_notify_cancel():
+                continue  # The caller went away while the job was queued
+
+            started = time.perf_counter()
+            with self._lock:
+                self._job_stats[priority].record((started - enqueued_at) * 1000)
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self._service_ms.append((time.perf_counter() - started) * 1000)
+
+    def _retry_after(self, backlog: int, unit_ms: float) -> int:
+        return max(1, math.ceil(backlog * unit_ms / 1000))
+
+    async def submit(self, priority: int, fn: Callable[..., Any], *args: Any) -> Any:
+        """Queues ``fn(*args)`` for the embedding workers and awaits its result."""
+        self._ensure_workers()
+        with self._lock:
+            self._queued[priority] += 1
+
+        future: Future = Future()
+        self._queue.put((priority, next(self._sequence), time.perf_counter(), fn, args, future))
+        return await asyncio.wrap_future(future)
+
+    @asynccontextmanager
+    async def query_slot(self):
+        """
+        Counts one question against ``max_queued_queries`` for the duration of the block.
+
+        Raises:
+            OverloadedError: ``max_queued_queries`` questions are already in flight.
+        """
+        if self._queries_in_flight >= self.max_queued_queries:
+            with self._lock:
+                self._job_stats[INTERACTIVE].rejected += 1
+            # A slot frees up roughly once per request duration
+            avg_ms = sum(self._query_ms) / len(self._query_ms) if self._query_ms else 1000.0
+            raise OverloadedError(
+                "Too many questions are in progress; please retry shortly",
+                status_code=503,
+                retry_after=self._retry_after(1, avg_ms)
+            )
+
+        started = time.perf_counter()
+        self._queries_in_flight += 1
+        try:
+            yield
+        finally:
+            self._queries_in_flight -= 1
+            self._query_ms.append((time.perf_counter() - started) * 1000)
+
+    @asynccontextmanager
+    async def ingestion_slot(self):
+        """
+        Holds one of the bounded ingestion slots for the duration of the block.
+
+        Raises:
+            OverloadedError: All slots are busy and the waiting list is full.
+        """
+        if self._ingestion_slots.locked() and self._ingestions_pending >= self.max_pending_ingestions:
+            self._ingestion_stats.rejected += 1
+            avg_ms = sum(self._ingestion_ms) / len(self._ingestion_ms) if self._ingestion_ms else 10000.0
+            backlog = (self._ingestions_pending + self._ingestions_active) / self.max_concurrent_ingestions
+            raise OverloadedError(
+                "Too many uploads are in progress; please retry later",
+                status_code=429,
+                retry_after=self._retry_after(math.ceil(backlog), avg_ms)
+            )
+
+        waiting_since = time.perf_counter()
+        self._ingestions_pending += 1
+        try:
+            await self._ingestion_slots.acquire()
+        finally:
+            self._ingestions_pending -= 1
+
+        started = time.perf_counter()
+        self._ingestion_stats.record((started - waiting_since) * 1000)
+        self._ingestions_active += 1
+        try:
+            yield
+        finally:
+            self._ingestions_active -= 1
+            self._ingestion_ms.append((time.perf_counter() - started) * 1000)
+            self._ingestion_slots.release()
+
+    async def run_extraction(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs CPU-heavy PDF extraction/chunking in a separate process.
+
+        Keeping it out of the API process stops it competing with request
+        handling for the GIL. The pool is sized to ``MAX_CONCURRENT_INGESTIONS``.
+
+        Raises:
+            OverloadedError: A worker died (crash, OOM kill). The broken pool is
+                dropped so the next call starts a fresh one.
+        """
+        if self._extraction_pool is None:
+            self._extraction_pool = ProcessPoolExecutor(
+                max_workers=self.max_concurrent_ingestions,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        pool = self._extraction_pool
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # Concurrent callers may all see the same broken pool; only drop it once
+            if self._extraction_pool is pool:
+                self._extraction_pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise OverloadedError(
+                "PDF extraction worker crashed; please retry",
+                status_code=503,
+                retry_after=1
+            )
+
+    def shutdown(self) -> None:
+        if self._extraction_pool is not None:
+            self._extraction_pool.shutdown(wait=False, cancel_futures=True)
+            self._extraction_pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queues = {
+                _PRIORITY_NAMES[p]: {"queued": self._queued[p], **self._job_stats[p].snapshot()}
+                for p in (INTERACTIVE, INGESTION)
+            }
+        return {
+            "embedding_workers": self.workers,
+            "queues": queues,
+            "ingestions": {
+                "active": self._ingestions_active,
+                "pending": self._ingestions_pending,
+                "max_concurrent": self.max_concurrent_ingestions,
+                "max_pending": self.max_pending_ingestions,
+                **self._ingestion_stats.snapshot(),
+            },
+            "queries_in_flight": self._queries_in_flight,
+            "max_queued_queries": self.max_queued_queries,
+        }
+
+
+scheduler = PriorityScheduler(
+    workers=EMBEDDING_WORKERS,
+    max_concurrent_ingestions=MAX_CONCURRENT_INGESTIONS,
+    max_pending_ingestions=MAX_PENDING_INGESTIONS,
+    max_queued_queries=MAX_QUEUED_QUERIES,
+)
@@ -0,0 +1,155 @@
+# app/snapshot.py
+
+import json
+import os
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from .compression import dequantize, quantize
+
+# Version 1 always stored float16 vectors; version 2 adds the embedding_dtype field
+SNAPSHOT_FORMAT_VERSION = 2
+
+
+def _pack_strings(values: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Packs strings into one UTF-8 byte blob plus offsets, avoiding pickled object arrays.
+    """
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(item) for item in encoded], dtype=np.int64)
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return {"blob": blob, "offsets": offsets}
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = blob.tobytes()
+    return [
+        raw[offsets[i]:offsets[i + 1]].decode("utf-8")
+        for i in range(len(offsets) - 1)
+    ]
+
+
+def write_snapshot(
+    path: str,
+    ids: List[str],
+    chunks: List[str],
+    embeddings: np.ndarray,
+    metadatas: List[Dict[str, Any]],
+    model_name: str,
+    dtype: str = "float16",
+) -> None:
+    """
+    Writes pre-embedded chunks to a portable NPZ snapshot.
+
+    Vectors are stored as ``dtype`` (int8 adds per-dimension scales); ids, texts and
+    JSON-encoded metadata are stored as packed UTF-8 blobs. The file is written to a
+    temporary path and renamed into place so an interrupted write never leaves a
+    truncated snapshot behind.
+
+    Args:
+        path: Destination file (``.npz``).
+        ids: Unique id for each chunk.
+        chunks: Chunk texts.
+        embeddings: Array of shape (n_chunks, dim).
+        metadatas: Metadata dict for each chunk.
+        model_name: Embedding model used to produce the vectors.
+        dtype: "float32", "float16" or "int8".
+    """
+    if not (len(ids) == len(chunks) == len(metadatas) == len(embeddings)):
+        raise ValueError("ids, chunks, metadatas and embeddings must have the same length")
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if vectors.ndim != 2:
+        vectors = vectors.reshape(len(ids), -1)
+    packed = quantize(vectors, dtype)
+
+    arrays: Dict[str, np.ndarray] = {
+        "format_version": np.array(SNAPSHOT_FORMAT_VERSION, dtype=np.int32),
+        "model_name": np.array(model_name),
+        "embedding_dtype": np.array(dtype),
+        "embeddings": packed["codes"],
+    }
+    if "scales" in packed:
+        arrays["embedding_scales"] = packed["scales"]
+    for name, values in (
+        ("ids", ids),
+        ("texts", chunks),
+        ("metadatas", [json.dumps(m, ensure_ascii=False) for m in metadatas]),
+    ):
+        strings = _pack_strings(values)
+        arrays[f"{name}_blob"] = strings["blob"]
+        arrays[f"{name}_offsets"] = strings["offsets"]
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise RuntimeError(f"Failed to write snapshot {path}: {e}")
+
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    """
+    Reads a snapshot written by ``write_snapshot``.
+
+    Returns:
+        A dict with ``ids``, ``texts``, ``metadatas``, ``embeddings`` (float32 array),
+        ``embedding_dtype`` and ``model_name``.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["format_version"])
+            if version not in (1, SNAPSHOT_FORMAT_VERSION):
+                raise ValueError(f"Unsupported snapshot format version: {version}")
+
+            scales = data["embedding_scales"] if "embedding_scales" in data else None
+            return {
+                "model_name": str(data["model_name"]),
+                "embedding_dtype": str(data["embedding_dtype"]) if version > 1 else "float16",
+                "ids": _unpack_strings(data["ids_blob"], data["ids_offsets"]),
+                "texts": _unpack_strings(data["texts_blob"], data["texts_offsets"]),
+                "metadatas": [
+                    json.loads(m)
+                    for m in _unpack_strings(data["metadatas_blob"], data["metadatas_offsets"])
+                ],
+                "embeddings": dequantize(data["embeddings"], scales),
+            }
+    except ValueError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Failed to read snapshot {path}: {e}")
+
+
+def import_snapshot(path: str, replace: bool = False) -> Tuple[int, int]:
+    """
+    Bulk-imports a snapshot into the vector database without re-embedding.
+
+    Args:
+        path: Snapshot file to load.
+        replace: Clear the collection before importing.
+
+    Returns:
+        Number of chunks imported and number of chunks cleared beforehand.
+    """
+    from ..config import EMBEDDING_MODEL_NAME
+    from .vectordb import bulk_add, clear_collection
+
+    snapshot = read_snapshot(path)
+    if snapshot["model_name"] != EMBEDDING_MODEL_NAME:
+        raise ValueError(
+            f"Snapshot was embedded with '{snapshot['model_name']}', "
+            f"but the configured model is '{EMBEDDING_MODEL_NAME}'"
+        )
+
+    cleared = clear_collection() if replace else 0
+
+    imported = bulk_add(
+        snapshot["ids"],
+        snapshot["texts"],
+        snapshot["embeddings"],
+        snapshot["metadatas"]
+    )
+    return imported, cleared
@@ -1,21 +1,131 @@
-from typing import List
+import os
+import shutil
+from typing import Any, Dict, List, Optional
 import numpy as np
-from ..config import get_chroma_client, get_vector_db_collection
+from ..config import (
+    get_chroma_client,
+    get_vector_db_collection,
+    CHROMA_DB_PATH,
+    EMBEDDING_REDUCED_DIM,
+    EMBEDDING_REDUCTION,
+    EMBEDDING_STORAGE_DTYPE,
+    RESCORE_FACTOR,
+)
+from ..logging_config import logger
+from .compression import (
+    append_rescore_vectors,
+    apply_reducer,
+    fit_reducer,
+    get_rescore_vectors,
+    load_reducer,
+    load_rescore_store,
+    save_reducer,
+    squared_l2,
+)
 
 # ✅ No type checker complaints now
 client = get_chroma_client()
 collection = get_vector_db_collection(client)
 
-def store_embeddings(chunks: List[str], embeddings: List[List[float]]) -> None:
+# Sidecar files kept next to the ChromaDB data when the collection was built with
+# EMBEDDING_REDUCED_DIM set: the fitted reducer, and full-dimension vectors used to
+# re-score candidates. Once written they define how the collection is queried.
+REDUCER_PATH = os.path.join(CHROMA_DB_PATH, "embedding_reducer.npz")
+RESCORE_STORE_DIR = os.path.join(CHROMA_DB_PATH, "rescore_vectors")
+
+_sidecar_cache: Dict[str, Any] = {}
+
+
+def _load_cached(path: str, loader):
+    """Loads a sidecar file or directory once and reloads it only when it changes on disk."""
+    if not os.path.exists(path):
+        _sidecar_cache.pop(path, None)
+        return None
+    mtime = os.stat(path).st_mtime_ns
+    cached = _sidecar_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, loader(path))
+        _sidecar_cache[path] = cached
+    return cached[1]
+
+
+def _remove_sidecars() -> None:
+    if os.path.exists(REDUCER_PATH):
+        os.unlink(REDUCER_PATH)
+    shutil.rmtree(RESCORE_STORE_DIR, ignore_errors=True)
+    _sidecar_cache.clear()
+
+
+def _prepare_index_vectors(ids: List[str], embeddings: np.ndarray) -> np.ndarray:
+    """
+    Returns the vectors to store in ChromaDB.
+
+    An empty collection follows the current settings: with EMBEDDING_REDUCED_DIM
+    set, a reducer is fitted and, if RESCORE_FACTOR > 1, a re-scoring store is
+    started. A non-empty collection keeps the layout it was built with, whatever
+    the settings say now, so every row is stored and queried the same way.
+
+    Raises:
+        ValueError: EMBEDDING_REDUCED_DIM is set but the collection already holds
+            full-dimension vectors.
+    """
+    if collection.count() == 0:
+        _remove_sidecars()
+        if not EMBEDDING_REDUCED_DIM:
+            return embeddings
+        reducer = fit_reducer(embeddings, EMBEDDING_REDUCED_DIM, EMBEDDING_REDUCTION)
+        save_reducer(REDUCER_PATH, reducer)
+        if RESCORE_FACTOR > 1:
+            append_rescore_vectors(RESCORE_STORE_DIR, ids, embeddings, EMBEDDING_STORAGE_DTYPE)
+        return apply_reducer(embeddings, reducer)
+
+    reducer = _load_cached(REDUCER_PATH, load_reducer)
+    if reducer is None:
+        if EMBEDDING_REDUCED_DIM:
+            raise ValueError(
+                f"EMBEDDING_REDUCED_DIM={EMBEDDING_REDUCED_DIM} but the collection holds full-dimension "
+                "vectors; re-import with `python -m app.ingest load <snapshot> --replace`"
+            )
+        return embeddings
+
+    # Only extend a store that covers the existing rows; a partial one would drop candidates
+    if os.path.isdir(RESCORE_STORE_DIR):
+        append_rescore_vectors(RESCORE_STORE_DIR, ids, embeddings, EMBEDDING_STORAGE_DTYPE)
+    return apply_reducer(embeddings, reducer)
+
+
+def _rescore(query: np.ndarray, results: Dict[str, Any], n_results: int, store: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-ranks candidate results by full-dimension distance and keeps the top ``n_results``."""
+    candidate_ids = results["ids"][0]
+    keep, vectors = get_rescore_vectors(store, candidate_ids)
+
+    if not keep:
+        order = list(range(min(n_results, len(candidate_ids))))
+        distances = [results["distances"][0][j] for j in order]
+    else:
+        full_distances = squared_l2(query, vectors)
+        ranked = np.argsort(full_distances)[:n_results]
+        order = [keep[j] for j in ranked]
+        distances = full_distances[ranked].tolist()
+
+    rescored = dict(results)
+    for key in ("ids", "documents", "metadatas", "embeddings", "uris", "data"):
+        if results.get(key) is not None:
+            rescored[key] = [[results[key][0][j] for j in order]]
+    rescored["distances"] = [distances]
+    return rescored
+
+
+def store_embeddings(chunks: List[str], embeddings: np.ndarray) -> None:
     try:
         print(f"📥 Storing {len(chunks)} chunks to ChromaDB...")
 
         ids = [f"chunk_{i}" for i in range(len(chunks))]
-        embedding_array = np.array(embeddings, dtype=np.float32)
+        embedding_array = np.asarray(embeddings, dtype=np.float32)
 
         collection.add(
             documents=chunks,
-            embeddings=embedding_array,
+            embeddings=_prepare_index_vectors(ids, embedding_array),
             ids=ids
         )
 
@@ -27,11 +137,70 @@ def store_embeddings(chunks: List[str], embeddings: List[List[float]]) -> None:
         raise RuntimeError(f"❌ Failed to store embeddings in ChromaDB: {e}")
 
 
-def query_similar_chunks(embedding: List[float], n_results: int = 3):
+def query_similar_chunks(embedding: np.ndarray, n_results: int = 3):
     try:
-        return collection.query(
-            query_embeddings=[embedding],
-            n_results=n_results
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        reducer = _load_cached(REDUCER_PATH, load_reducer)
+
+        if reducer is None:
+            return collection.query(
+                query_embeddings=query,
+                n_results=n_results
+            )
+
+        store = _load_cached(RESCORE_STORE_DIR, load_rescore_store) if RESCORE_FACTOR > 1 else None
+        results = collection.query(
+            query_embeddings=apply_reducer(query, reducer),
+            n_results=n_results * RESCORE_FACTOR if store else n_results
         )
+        return _rescore(query[0], results, n_results, store) if store else results
+
+    except Exception as e:
+        raise RuntimeError(f"❌ Failed to query ChromaDB: {e}")
+
+def clear_collection() -> int:
+    """
+    Deletes every chunk from the collection and returns how many were removed.
+    """
+    try:
+        existing = collection.get(include=[])
+        removed = 0
+        if existing and existing.get('ids'):
+            collection.delete(ids=existing['ids'])
+            removed = len(existing['ids'])
+        # Only once the chunks are gone, so a failed delete never leaves reduced vectors without their reducer
+        _remove_sidecars()
+        return removed
+    except Exception as e:
+        raise RuntimeError(f"❌ Failed to clear ChromaDB collection: {e}")
+
+
+def bulk_add(
+    ids: List[str],
+    chunks: List[str],
+    embeddings: np.ndarray,
+    metadatas: Optional[List[Dict[str, Any]]] = None,
+) -> int:
+    """
+    Upserts pre-computed embeddings in batches sized to the client's limit.
+
+    Upserting (rather than adding) keeps re-imports of the same snapshot idempotent.
+    """
+    try:
+        batch_size = client.get_max_batch_size()
+        embedding_array = _prepare_index_vectors(ids, np.asarray(embeddings, dtype=np.float32))
+
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            collection.upsert(
+                ids=ids[start:end],
+                documents=chunks[start:end],
+                embeddings=embedding_array[start:end],
+                metadatas=metadatas[start:end] if metadatas else None
+            )
+
+        logger.info(f"Imported {len(ids)} items into collection: {collection.name}")
+        return len(ids)
+
     except Exception as e:
-        raise RuntimeError(f"❌ Failed to query ChromaDB: {e}")
\ No newline at end of file
+        raise RuntimeError(f"❌ Failed to bulk import embeddings into ChromaDB: {e}")
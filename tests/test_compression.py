@@ -0,0 +1,154 @@
+# test_compression.py
+
+import numpy as np
+import pytest
+
+from app.services.compression import (
+    STORAGE_DTYPES,
+    append_rescore_vectors,
+    apply_reducer,
+    dequantize,
+    evaluate_storage_modes,
+    fit_reducer,
+    get_rescore_vectors,
+    load_reducer,
+    load_rescore_store,
+    quantize,
+    save_reducer,
+)
+
+
+def _unit_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _low_rank_vectors(n: int, dim: int, rank: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, rank)) @ rng.normal(size=(rank, dim))
+    vectors += 0.01 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype,tolerance", [("float32", 0.0), ("float16", 1e-3), ("int8", 1e-2)])
+def test_quantize_round_trip(dtype, tolerance):
+    vectors = _unit_vectors(200, 32)
+    packed = quantize(vectors, dtype)
+
+    assert packed["codes"].dtype == np.dtype(dtype)
+    assert ("scales" in packed) == (dtype == "int8")
+    restored = dequantize(packed["codes"], packed.get("scales"))
+    assert restored.dtype == np.float32
+    assert np.abs(restored - vectors).max() <= tolerance
+
+
+@pytest.mark.parametrize("dtype", STORAGE_DTYPES)
+def test_quantize_empty(dtype):
+    packed = quantize(np.empty((0, 16), dtype=np.float32), dtype)
+    assert dequantize(packed["codes"], packed.get("scales")).shape == (0, 16)
+
+
+def test_quantize_rejects_unknown_dtype():
+    with pytest.raises(ValueError):
+        quantize(_unit_vectors(4, 8), "bfloat16")
+
+
+def test_truncate_reducer_keeps_leading_dimensions():
+    vectors = _unit_vectors(10, 32)
+    reducer = fit_reducer(vectors, 8, "truncate")
+    reduced = apply_reducer(vectors, reducer)
+
+    assert reduced.shape == (10, 8)
+    expected = vectors[:, :8] / np.linalg.norm(vectors[:, :8], axis=1, keepdims=True)
+    np.testing.assert_allclose(reduced, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_pca_reducer_recovers_low_rank_structure(tmp_path):
+    vectors = _low_rank_vectors(500, 64, rank=8)
+    reducer = fit_reducer(vectors, 8, "pca")
+
+    assert reducer["method"] == "pca"
+    assert reducer["components"].shape == (8, 64)
+    np.testing.assert_allclose(reducer["components"] @ reducer["components"].T, np.eye(8), atol=1e-4)
+
+    save_reducer(str(tmp_path / "reducer.npz"), reducer)
+    loaded = load_reducer(str(tmp_path / "reducer.npz"))
+    np.testing.assert_allclose(apply_reducer(vectors, loaded), apply_reducer(vectors, reducer))
+
+
+def test_pca_falls_back_to_truncation_with_too_few_samples():
+    reducer = fit_reducer(_unit_vectors(5, 64), 16, "pca")
+    assert reducer == {"method": "truncate", "dim": 16}
+
+
+def test_rescore_store_keeps_ids_unique_and_codes_untouched(tmp_path):
+    store_dir = str(tmp_path / "store")
+    first = _unit_vectors(20, 16, seed=1)
+    append_rescore_vectors(store_dir, [f"a{i}" for i in range(20)], first, "int8")
+    original = get_rescore_vectors(load_rescore_store(store_dir), [f"a{i}" for i in range(20)])[1]
+
+    # Larger values would change the int8 scales if existing rows were requantized
+    append_rescore_vectors(store_dir, [f"b{i}" for i in range(5)], 10 * _unit_vectors(5, 16, seed=2), "int8")
+    for _ in range(3):
+        append_rescore_vectors(store_dir, [f"a{i}" for i in range(10, 20)], first[10:], "int8")
+
+    store = load_rescore_store(store_dir)
+    stored_ids = np.concatenate([shard["ids"] for shard in store["shards"]])
+    assert len(stored_ids) == len(set(stored_ids.tolist())) == 25
+    assert sum(len(shard["codes"]) for shard in store["shards"]) == 25
+    assert all((np.diff(shard["ids"].argsort()) == 1).all() for shard in store["shards"])
+    assert store["nbytes"] == sum(
+        array.nbytes for shard in store["shards"] for array in shard.values() if array is not None
+    )
+
+    found, vectors = get_rescore_vectors(store, [f"a{i}" for i in range(20)] + ["missing"])
+    assert found == list(range(20))
+    np.testing.assert_array_equal(vectors[:10], original[:10])
+    assert np.abs(vectors - first).max() < 1e-2
+
+
+def test_rescore_store_empty(tmp_path):
+    store_dir = str(tmp_path / "store")
+    append_rescore_vectors(store_dir, [], np.empty((0, 8), dtype=np.float32), "float16")
+    assert load_rescore_store(store_dir) is None
+
+
+def test_rescore_lookup_preserves_request_order(tmp_path):
+    store_dir = str(tmp_path / "store")
+    vectors = _unit_vectors(6, 8)
+    append_rescore_vectors(store_dir, ["f", "b", "d"], vectors[:3], "float32")
+    append_rescore_vectors(store_dir, ["a", "e", "c"], vectors[3:], "float32")
+
+    found, restored = get_rescore_vectors(load_rescore_store(store_dir), ["c", "x", "f", "a"])
+
+    assert found == [0, 2, 3]
+    np.testing.assert_array_equal(restored, vectors[[5, 0, 3]])
+
+
+def test_evaluate_storage_modes_reports_deployable_modes():
+    vectors = _low_rank_vectors(400, 32, rank=6)
+    ids = [f"doc_chunk_{i:03d}" for i in range(400)]
+    report = evaluate_storage_modes(vectors, k=5, n_queries=40, dims=[8], method="pca", ids=ids)
+
+    assert [(row["dim"], row["store_dtype"]) for row in report] == [
+        (32, None), (8, "float32"), (8, "float16"), (8, "int8"),
+    ]
+    full = report[0]
+    assert full["recall"] == 1.0 and full["recall_rescored"] is None
+    assert full["index_mb"] == full["total_mb"] == pytest.approx(400 * 32 * 4 / 1024 ** 2, abs=1e-3)
+
+    for row in report[1:]:
+        # ChromaDB stores the reduced index as float32 whatever the store dtype
+        assert row["index_mb"] == pytest.approx(400 * 8 * 4 / 1024 ** 2, abs=1e-3)
+        assert row["recall_rescored"] >= row["recall"] - 0.05
+        assert row["total_mb"] == pytest.approx(row["index_mb"] + row["store_mb"], abs=2e-3)
+
+    # int8 store: 1 byte per value, per-dimension scales, and 13-byte ids
+    int8_store_mb = (400 * 32 + 32 * 4 + 400 * 13) / 1024 ** 2
+    assert report[3]["store_mb"] == pytest.approx(int8_store_mb, abs=1e-3)
+
+
+def test_evaluate_without_rescoring_reports_index_only():
+    vectors = _low_rank_vectors(200, 16, rank=4)
+    report = evaluate_storage_modes(vectors, k=5, n_queries=20, dims=[4], rescore_factor=1)
+    assert [(row["dim"], row["store_dtype"], row["store_mb"]) for row in report] == [(16, None, 0.0), (4, None, 0.0)]
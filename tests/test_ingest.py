@@ -0,0 +1,166 @@
+# test_ingest.py
+
+import os
+import sys
+import types
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app import ingest
+from app.config import EMBEDDING_MODEL_NAME
+from app.services.snapshot import import_snapshot, read_snapshot, write_snapshot
+
+
+class FakePipeline:
+    """Stands in for PDF extraction and the embedding model; "PDFs" are plain text files."""
+
+    def __init__(self):
+        self.extracted = []
+        self.embed_calls = 0
+        self.fail_on_embed_call = None
+
+    def chunk_pdf(self, path, chunk_size=1000, chunk_overlap=150):
+        self.extracted.append(os.path.basename(path))
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if "CRASH" in text:
+            raise ValueError("corrupt PDF")
+        return [line for line in text.splitlines() if line]
+
+    def embed_chunks(self, chunks, batch_size=32):
+        self.embed_calls += 1
+        if self.embed_calls == self.fail_on_embed_call:
+            raise RuntimeError("interrupted")
+        return np.stack([
+            np.random.default_rng(zlib.crc32(chunk.encode("utf-8"))).normal(size=8).astype(np.float32)
+            for chunk in chunks
+        ])
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    fake = FakePipeline()
+    # Threads instead of spawned processes, so the patched extractor is visible to the workers
+    monkeypatch.setattr(ingest, "ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(ingest, "chunk_pdf", fake.chunk_pdf)
+    monkeypatch.setitem(sys.modules, "app.services.embedder", types.SimpleNamespace(embed_chunks=fake.embed_chunks))
+    return fake
+
+
+def _write_pdf(root, rel_path, text):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _sources(snapshot_path):
+    return sorted({metadata["source"] for metadata in read_snapshot(snapshot_path)["metadatas"]})
+
+
+def test_build_writes_snapshot_and_counts_empty_pdfs_as_processed(tmp_path, pipeline):
+    root = tmp_path / "pdfs"
+    _write_pdf(root, "a.pdf", "alpha one\nalpha two")
+    _write_pdf(root, "nested/b.pdf", "beta one")
+    _write_pdf(root, "scanned.pdf", "")
+    output = str(tmp_path / "corpus.npz")
+
+    total, skipped = ingest.build_snapshot(str(root), output, workers=2, batch_size=2)
+
+    assert (total, skipped) == (3, [])
+    snapshot = read_snapshot(output)
+    assert snapshot["model_name"] == EMBEDDING_MODEL_NAME
+    assert sorted(snapshot["texts"]) == ["alpha one", "alpha two", "beta one"]
+    assert _sources(output) == ["a.pdf", os.path.join("nested", "b.pdf")]
+    assert len(set(snapshot["ids"])) == 3
+    assert not os.path.exists(f"{output}.parts")
+
+
+def test_interrupted_build_resumes_from_checkpoints(tmp_path, pipeline):
+    root = tmp_path / "pdfs"
+    for name in ("a", "b", "c"):
+        _write_pdf(root, f"{name}.pdf", f"{name} text")
+    output = str(tmp_path / "corpus.npz")
+
+    pipeline.fail_on_embed_call = 2
+    with pytest.raises(RuntimeError):
+        ingest.build_snapshot(str(root), output, workers=1, batch_size=1)
+    assert len(os.listdir(f"{output}.parts")) == 1
+
+    pipeline.extracted.clear()
+    total, skipped = ingest.build_snapshot(str(root), output, workers=1, batch_size=1)
+
+    assert (total, skipped) == (3, [])
+    assert len(pipeline.extracted) == 2
+    assert _sources(output) == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_changed_pdf_is_reprocessed(tmp_path, pipeline):
+    root = tmp_path / "pdfs"
+    _write_pdf(root, "a.pdf", "old text")
+    changed = _write_pdf(root, "b.pdf", "old text")
+    output = str(tmp_path / "corpus.npz")
+    ingest.build_snapshot(str(root), output, workers=1, batch_size=8, keep_parts=True)
+
+    changed.write_text("new text", encoding="utf-8")
+    mtime_ns = os.stat(changed).st_mtime_ns + 10 ** 9
+    os.utime(changed, ns=(mtime_ns, mtime_ns))
+    pipeline.extracted.clear()
+    ingest.build_snapshot(str(root), output, workers=1, batch_size=8)
+
+    assert pipeline.extracted == ["b.pdf"]
+    assert sorted(read_snapshot(output)["texts"]) == ["new text", "old text"]
+
+
+def test_build_cli_exits_1_and_keeps_checkpoints_when_a_pdf_is_skipped(tmp_path, pipeline):
+    root = tmp_path / "pdfs"
+    _write_pdf(root, "good.pdf", "good text")
+    _write_pdf(root, "broken.pdf", "CRASH")
+    output = str(tmp_path / "corpus.npz")
+
+    assert ingest.main(["build", str(root), "--output", output, "--workers", "1"]) == 1
+    assert _sources(output) == ["good.pdf"]
+    assert len(os.listdir(f"{output}.parts")) == 1
+
+    # Only the failed PDF is retried
+    pipeline.extracted.clear()
+    assert ingest.main(["build", str(root), "--output", output, "--workers", "1"]) == 1
+    assert pipeline.extracted == ["broken.pdf"]
+
+
+def test_import_snapshot(tmp_path, monkeypatch):
+    calls = {}
+
+    def bulk_add(ids, chunks, embeddings, metadatas=None):
+        calls["bulk_add"] = (ids, chunks, embeddings, metadatas)
+        return len(ids)
+
+    def clear_collection():
+        calls["clear_collection"] = True
+        return 7
+
+    monkeypatch.setitem(
+        sys.modules,
+        "app.services.vectordb",
+        types.SimpleNamespace(bulk_add=bulk_add, clear_collection=clear_collection)
+    )
+    vectors = np.random.default_rng(0).normal(size=(2, 8)).astype(np.float32)
+    path = str(tmp_path / "corpus.npz")
+    write_snapshot(path, ["d_chunk_0", "d_chunk_1"], ["one", "two"], vectors,
+                   [{"source": "d.pdf", "chunk_index": i} for i in range(2)], EMBEDDING_MODEL_NAME)
+
+    assert import_snapshot(path, replace=True) == (2, 7)
+    ids, chunks, embeddings, metadatas = calls["bulk_add"]
+    assert (ids, chunks) == (["d_chunk_0", "d_chunk_1"], ["one", "two"])
+    assert np.abs(embeddings - vectors).max() < 5e-3
+    assert metadatas[1] == {"source": "d.pdf", "chunk_index": 1}
+
+    calls.clear()
+    other = str(tmp_path / "other.npz")
+    write_snapshot(other, ["x"], ["x"], vectors[:1], [{}], "some-other-model")
+    with pytest.raises(ValueError):
+        import_snapshot(other)
+    assert calls == {}
@@ -0,0 +1,154 @@
+# test_scheduler.py
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+from app.exceptions import overloaded_error_handler
+from app.models import SchedulerStats
+from app.services.scheduler import INGESTION, INTERACTIVE, OverloadedError, PriorityScheduler
+
+
+async def _wait_until(condition, timeout: float = 5.0):
+    """Yields to the event loop until ``condition()`` holds."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out waiting for the scheduler"
+        await asyncio.sleep(0.001)
+
+
+def _queued(scheduler, name):
+    return scheduler.stats()["queues"][name]["queued"]
+
+
+def test_interactive_work_jumps_queued_ingestion():
+    scheduler = PriorityScheduler(workers=1)
+    picked_up = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def job(name):
+        if name == "blocker":
+            picked_up.set()
+            release.wait(5)
+        order.append(name)
+        return name
+
+    async def run():
+        blocker = asyncio.create_task(scheduler.submit(INGESTION, job, "blocker"))
+        await _wait_until(picked_up.is_set)
+        ingestion = [asyncio.create_task(scheduler.submit(INGESTION, job, f"ingest{i}")) for i in range(3)]
+        await _wait_until(lambda: _queued(scheduler, "ingestion") == 3)
+        question = asyncio.create_task(scheduler.submit(INTERACTIVE, job, "question"))
+        await _wait_until(lambda: _queued(scheduler, "interactive") == 1)
+        release.set()
+        return await asyncio.gather(blocker, *ingestion, question)
+
+    results = asyncio.run(run())
+
+    assert results == ["blocker", "ingest0", "ingest1", "ingest2", "question"]
+    assert order == ["blocker", "question", "ingest0", "ingest1", "ingest2"]
+
+
+def test_in_flight_query_limit_returns_503_with_retry_after():
+    scheduler = PriorityScheduler(workers=1, max_queued_queries=2)
+
+    async def ask(done: asyncio.Event):
+        # Held through retrieval and the LLM call, not just while waiting for the model
+        async with scheduler.query_slot():
+            await scheduler.submit(INTERACTIVE, abs, -1)
+            await done.wait()
+
+    async def run():
+        done = asyncio.Event()
+        asking = [asyncio.create_task(ask(done)) for _ in range(2)]
+        await _wait_until(lambda: scheduler.stats()["queues"]["interactive"]["completed"] == 2)
+        assert scheduler.stats()["queries_in_flight"] == 2
+
+        with pytest.raises(OverloadedError) as rejected:
+            async with scheduler.query_slot():
+                pass
+        done.set()
+        await asyncio.gather(*asking)
+        return rejected.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == 503
+    assert error.retry_after >= 1
+    stats = scheduler.stats()
+    assert stats["queues"]["interactive"]["rejected"] == 1
+    assert stats["queries_in_flight"] == 0
+
+
+def test_pending_ingestion_limit_returns_429_with_retry_after():
+    scheduler = PriorityScheduler(max_concurrent_ingestions=1, max_pending_ingestions=1)
+
+    async def upload(done: asyncio.Event):
+        async with scheduler.ingestion_slot():
+            await done.wait()
+
+    async def run():
+        done = asyncio.Event()
+        active = asyncio.create_task(upload(done))
+        pending = asyncio.create_task(upload(done))
+        await _wait_until(lambda: scheduler.stats()["ingestions"]["pending"] == 1)
+
+        stats = scheduler.stats()["ingestions"]
+        assert (stats["active"], stats["pending"]) == (1, 1)
+
+        with pytest.raises(OverloadedError) as rejected:
+            async with scheduler.ingestion_slot():
+                pass
+        done.set()
+        await asyncio.gather(active, pending)
+        return rejected.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == 429
+    assert error.retry_after >= 1
+    stats = scheduler.stats()["ingestions"]
+    assert (stats["active"], stats["pending"], stats["completed"], stats["rejected"]) == (0, 0, 2, 1)
+
+
+def test_overloaded_error_handler_sets_retry_after_header():
+    error = OverloadedError("busy", status_code=429, retry_after=7)
+    response = asyncio.run(overloaded_error_handler(None, error))
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
+
+
+def test_stats_match_health_scheduler_response_model():
+    scheduler = PriorityScheduler(workers=2, max_queued_queries=8)
+    asyncio.run(scheduler.submit(INTERACTIVE, abs, -1))
+
+    stats = SchedulerStats(**scheduler.stats())
+
+    assert stats.embedding_workers == 2
+    assert (stats.queries_in_flight, stats.max_queued_queries) == (0, 8)
+    assert set(stats.queues) == {"interactive", "ingestion"}
+    assert stats.queues["interactive"].completed == 1
+    assert stats.queues["interactive"].queued == 0
+
+
+def test_broken_extraction_pool_is_replaced():
+    scheduler = PriorityScheduler()
+
+    async def run():
+        with pytest.raises(OverloadedError) as crashed:
+            await scheduler.run_extraction(os._exit, 1)
+        assert scheduler._extraction_pool is None
+        result = await scheduler.run_extraction(abs, -5)
+        return crashed.value, result
+
+    try:
+        error, result = asyncio.run(run())
+    finally:
+        scheduler.shutdown()
+
+    assert error.status_code == 503
+    assert result == 5
@@ -0,0 +1,54 @@
+# test_snapshot.py
+
+import numpy as np
+import pytest
+
+from app.services.snapshot import read_snapshot, write_snapshot
+
+
+def _corpus(n: int, dim: int = 24):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    ids = [f"doc_chunk_{i}" for i in range(n)]
+    texts = [f"chunk {i} — naïve café" for i in range(n)]
+    metadatas = [{"source": "docs/a.pdf", "chunk_index": i} for i in range(n)]
+    return ids, texts, vectors, metadatas
+
+
+@pytest.mark.parametrize("dtype,tolerance", [("float32", 0.0), ("float16", 5e-3), ("int8", 5e-2)])
+def test_snapshot_round_trip(tmp_path, dtype, tolerance):
+    ids, texts, vectors, metadatas = _corpus(50)
+    path = str(tmp_path / "corpus.npz")
+    write_snapshot(path, ids, texts, vectors, metadatas, "all-MiniLM-L6-v2", dtype=dtype)
+
+    snapshot = read_snapshot(path)
+    assert snapshot["model_name"] == "all-MiniLM-L6-v2"
+    assert snapshot["embedding_dtype"] == dtype
+    assert snapshot["ids"] == ids
+    assert snapshot["texts"] == texts
+    assert snapshot["metadatas"] == metadatas
+    assert snapshot["embeddings"].dtype == np.float32
+    assert np.abs(snapshot["embeddings"] - vectors).max() <= tolerance
+
+
+def test_float32_snapshot_is_lossless(tmp_path):
+    ids, texts, vectors, metadatas = _corpus(10)
+    path = str(tmp_path / "part.npz")
+    write_snapshot(path, ids, texts, vectors, metadatas, "m", dtype="float32")
+    np.testing.assert_array_equal(read_snapshot(path)["embeddings"], vectors)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_empty_snapshot(tmp_path, dtype):
+    path = str(tmp_path / "empty.npz")
+    write_snapshot(path, [], [], np.empty((0, 24), dtype=np.float32), [], "m", dtype=dtype)
+
+    snapshot = read_snapshot(path)
+    assert snapshot["ids"] == [] and snapshot["texts"] == [] and snapshot["metadatas"] == []
+    assert snapshot["embeddings"].shape == (0, 24)
+
+
+def test_write_snapshot_rejects_mismatched_lengths(tmp_path):
+    ids, texts, vectors, metadatas = _corpus(3)
+    with pytest.raises(ValueError):
+        write_snapshot(str(tmp_path / "bad.npz"), ids, texts[:2], vectors, metadatas, "m")